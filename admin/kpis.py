@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from middleware.profiling import ProfiledRoute
+from auth.dependencies import require_admin
+from kpi.snapshots import get_kpis
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import List, Optional
+
+# ✅ Grouped in Swagger under 'Admin KPIs'
+router = APIRouter(tags=["Admin KPIs"], route_class=ProfiledRoute)
+
+# ✅ DB session dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# ✅ Response models for Swagger docs
+class WorkflowKpi(BaseModel):
+    workflow_id: int
+    trucks_completed: int
+    avg_turnaround_minutes: Optional[float]
+
+class CheckpointKpi(BaseModel):
+    checkpoint_id: int
+    workflow_id: Optional[int]
+    visits: int
+    avg_dwell_minutes: Optional[float]
+
+class DailyKpi(BaseModel):
+    day: date
+    trucks_completed: int
+    avg_turnaround_minutes: Optional[float]
+
+class KpiReport(BaseModel):
+    start: date
+    end: date
+    snapshot_through: Optional[date]
+    live_days: List[date]
+    workflows: List[WorkflowKpi]
+    checkpoints: List[CheckpointKpi]
+    daily: List[DailyKpi]
+
+@router.get(
+    "/",
+    summary="Get throughput, turnaround and dwell KPIs",
+    description="Returns per-workflow throughput and average turnaround, per-checkpoint average dwell, and a daily series for the given date range. Closed days come from precomputed snapshots; the current day is aggregated live.",
+    response_model=KpiReport,
+    dependencies=[Depends(require_admin)]
+)
+def get_kpi_report(
+    start: date = Query(..., example="2024-04-01"),
+    end: date = Query(..., example="2024-04-30"),
+    db: Session = Depends(get_db)
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="End date must not be before start date")
+    if start > datetime.utcnow().date():
+        raise HTTPException(status_code=400, detail="Start date must not be in the future")
+    return get_kpis(db, start, end)
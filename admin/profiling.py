@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
+from auth.dependencies import require_admin
+from middleware.profiling import ProfiledRoute, get_profile, list_profiles
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+# ✅ Grouped in Swagger under 'Admin Profiling'
+router = APIRouter(tags=["Admin Profiling"], route_class=ProfiledRoute)
+
+# ✅ Summary model for the profile list
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    trigger: str
+    started_at: datetime
+    duration_ms: Optional[float]
+    status_code: Optional[int]
+    sample_count: int
+    statement_count: int
+    sql_time_ms: float
+
+# ✅ List captured profiles, newest first
+@router.get(
+    "/",
+    summary="List captured request profiles",
+    description="Returns the request profiles currently held in the in-memory ring buffer, newest first. Send 'X-Profile: 1' with an admin token on any request to capture one.",
+    response_model=List[ProfileSummary],
+    dependencies=[Depends(require_admin)]
+)
+def get_profiles():
+    return [p.summary() for p in list_profiles()]
+
+# ✅ Download a single profile
+@router.get(
+    "/{profile_id}",
+    summary="Download a request profile",
+    description="Returns the sampled Python stacks and SQL statements with timings for one profiled request. Use format=folded for a flamegraph-ready collapsed stack file.",
+    dependencies=[Depends(require_admin)]
+)
+def download_profile(profile_id: int, format: str = Query("json", example="json")):
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "folded":
+        return PlainTextResponse(
+            profile.folded(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+        )
+    if format != "json":
+        raise HTTPException(status_code=400, detail="Invalid format. Must be 'json' or 'folded'")
+
+    return JSONResponse(
+        jsonable_encoder(profile.to_dict()),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.json"'}
+    )
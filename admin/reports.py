@@ -3,13 +3,14 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from models import CheckpointLog
 from database import SessionLocal
+from middleware.profiling import ProfiledRoute
 from auth.dependencies import require_admin
 from datetime import datetime
 from pydantic import BaseModel
 from typing import List, Optional
 
 # ✅ Tag defined here only — DO NOT add again in main.py
-router = APIRouter(tags=["Admin Reports"])
+router = APIRouter(tags=["Admin Reports"], route_class=ProfiledRoute)
 
 # ✅ Shared DB dependency
 def get_db():
@@ -29,6 +30,19 @@ class TurnaroundReport(BaseModel):
     class Config:
         orm_mode = True
 
+# ✅ First check-in / last check-out per truck within the range
+def turnaround_query(db: Session, start: datetime, end: datetime):
+    return (
+        db.query(
+            CheckpointLog.truckId,
+            func.min(CheckpointLog.checkInTime).label("start_time"),
+            func.max(CheckpointLog.checkOutTime).label("end_time")
+        )
+        .filter(CheckpointLog.checkInTime >= start)
+        .filter(CheckpointLog.checkOutTime <= end)
+        .group_by(CheckpointLog.truckId)
+    )
+
 # ✅ Documented GET endpoint with proper query param examples
 @router.get(
     "/turnaround",
@@ -42,17 +56,7 @@ def get_turnaround_report(
     end: datetime = Query(..., example="2024-04-30T23:59:59"),
     db: Session = Depends(get_db)
 ):
-    result = (
-        db.query(
-            CheckpointLog.truckId,
-            func.min(CheckpointLog.checkInTime).label("start_time"),
-            func.max(CheckpointLog.checkOutTime).label("end_time")
-        )
-        .filter(CheckpointLog.checkInTime >= start)
-        .filter(CheckpointLog.checkOutTime <= end)
-        .group_by(CheckpointLog.truckId)
-        .all()
-    )
+    result = turnaround_query(db, start, end).all()
 
     report = []
     for row in result:
@@ -2,12 +2,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from models import Truck, Checkpoint
 from database import SessionLocal
+from middleware.profiling import ProfiledRoute
 from auth.dependencies import require_admin
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
 # ✅ Tag for grouping in Swagger UI
-router = APIRouter(tags=["Admin Trucks"])
+router = APIRouter(tags=["Admin Trucks"], route_class=ProfiledRoute)
 
 # ✅ DB Session Dependency
 def get_db():
@@ -28,6 +29,13 @@ class TruckStatusResponse(BaseModel):
     class Config:
         orm_mode = True
 
+# ✅ Trucks joined with their current checkpoint
+def truck_status_query(db: Session):
+    return (
+        db.query(Truck, Checkpoint)
+        .join(Checkpoint, Truck.currentCheckpointId == Checkpoint.id)
+    )
+
 @router.get(
     "/status",
     summary="View real-time truck status",
@@ -36,11 +44,7 @@ class TruckStatusResponse(BaseModel):
     dependencies=[Depends(require_admin)]
 )
 def live_truck_status(db: Session = Depends(get_db)):
-    trucks = (
-        db.query(Truck, Checkpoint)
-        .join(Checkpoint, Truck.currentCheckpointId == Checkpoint.id)
-        .all()
-    )
+    trucks = truck_status_query(db).all()
 
     return [
         {
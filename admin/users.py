@@ -2,12 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models import User
 from database import SessionLocal
+from middleware.profiling import ProfiledRoute
 from auth.dependencies import require_admin
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
 # ✅ Grouped in Swagger under 'Admin Users'
-router = APIRouter(tags=["Admin Users"])
+router = APIRouter(tags=["Admin Users"], route_class=ProfiledRoute)
 
 # ✅ DB session dependency
 def get_db():
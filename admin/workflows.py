@@ -2,12 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models import Workflow, Checkpoint
 from database import SessionLocal
+from middleware.profiling import ProfiledRoute
 from auth.dependencies import require_admin
 from pydantic import BaseModel, Field
 from typing import List
 
 # ✅ Cleanly tagged for Swagger UI grouping
-router = APIRouter(tags=["Admin Workflow"])
+router = APIRouter(tags=["Admin Workflow"], route_class=ProfiledRoute)
 
 # ✅ DB dependency
 def get_db():
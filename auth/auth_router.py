@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import User
+from middleware.profiling import ProfiledRoute
 from auth.auth_handler import create_access_token
 from pydantic import BaseModel, Field
 from typing import Optional
 
-router = APIRouter(tags=["Auth"])  # Adds a dedicated 'Auth' section in docs
+router = APIRouter(tags=["Auth"], route_class=ProfiledRoute)  # Adds a dedicated 'Auth' section in docs
 
 def get_db():
     db = SessionLocal()
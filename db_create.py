@@ -1,8 +1,18 @@
 # db_create.py
 
+from sqlalchemy import text
 from database import engine
 from models import Base
 
+# ✅ create_all() never adds indexes to tables that already exist, so indexes added to
+# existing models are created explicitly here.
+EXISTING_TABLE_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS "ix_checkpointlogs_checkOutTime" ON checkpointlogs ("checkOutTime")',
+]
+
 if __name__ == "__main__":
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for statement in EXISTING_TABLE_INDEXES:
+            conn.execute(text(statement))
     print("✅ Tables created successfully!")
@@ -0,0 +1,43 @@
+# kpi/scheduler.py
+import logging
+import threading
+from datetime import datetime
+
+from database import SessionLocal
+from kpi.snapshots import catch_up
+
+logger = logging.getLogger("uvicorn.error")
+
+# ✅ How often the scheduler wakes up to look for newly closed days. Missed days
+# (downtime, deploys) are caught up on the next wake-up, oldest first.
+KPI_CHECK_INTERVAL_SECONDS = 600
+
+_stop = threading.Event()
+
+
+def run_once():
+    db = SessionLocal()
+    try:
+        count = catch_up(db, datetime.utcnow())
+        if count:
+            logger.info("KPI snapshots materialized for %s closed day(s) by this worker", count)
+    except Exception:
+        db.rollback()
+        logger.exception("KPI snapshot run failed")
+    finally:
+        db.close()
+
+
+def _loop():
+    while not _stop.is_set():
+        run_once()
+        _stop.wait(KPI_CHECK_INTERVAL_SECONDS)
+
+
+def start_scheduler():
+    _stop.clear()
+    threading.Thread(target=_loop, name="kpi-scheduler", daemon=True).start()
+
+
+def stop_scheduler():
+    _stop.set()
@@ -0,0 +1,300 @@
+# kpi/snapshots.py
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import func
+
+from models import Checkpoint, CheckpointLog, KpiCheckpointDaily, KpiSnapshotDay, KpiWorkflowDaily
+
+# ✅ A day (UTC, like every timestamp in checkpointlogs) is closed this long after midnight,
+# so check-outs recorded right at the boundary still land in the snapshot.
+DAY_CLOSE_DELAY = timedelta(minutes=5)
+
+# ✅ Open days (today, and yesterday until DAY_CLOSE_DELAY passes) are aggregated live and
+# cached briefly so dashboard refreshes don't rescan the same logs.
+LIVE_CACHE_SECONDS = 30
+
+_live_cache: Dict[date, Tuple[float, dict]] = {}
+_live_cache_lock = threading.Lock()
+
+
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime(day.year, day.month, day.day)
+    return start, start + timedelta(days=1)
+
+
+def last_closed_day(now: datetime) -> date:
+    return (now - DAY_CLOSE_DELAY).date() - timedelta(days=1)
+
+
+# ---------- Computing one day ----------
+
+def _empty_day() -> dict:
+    return {
+        "workflows": defaultdict(lambda: {"trucks_completed": 0, "turnaround_seconds": 0.0}),
+        "checkpoints": defaultdict(lambda: {"workflow_id": None, "visits": 0, "dwell_seconds": 0.0}),
+    }
+
+
+def compute_range(db: Session, first_day: date, last_day: date) -> Dict[date, dict]:
+    """
+    Aggregates check-outs from checkpointlogs for every day in [first_day, last_day], using
+    two queries for the whole range. Days without check-outs are absent from the result.
+
+    A truck completes a workflow when it checks out of the workflow's last checkpoint
+    (highest position); its turnaround runs from its earliest check-in in that workflow,
+    matching the turnaround report. Dwell is check-out minus check-in per checkpoint visit.
+    """
+    start, _ = _day_bounds(first_day)
+    _, end = _day_bounds(last_day)
+
+    last = (
+        db.query(Checkpoint.workflowId.label("workflowId"), func.max(Checkpoint.position).label("position"))
+        .group_by(Checkpoint.workflowId)
+        .subquery()
+    )
+    final = aliased(Checkpoint)
+    first_log = aliased(CheckpointLog)
+    first_cp = aliased(Checkpoint)
+    started = (
+        db.query(func.min(first_log.checkInTime))
+        .join(first_cp, first_log.checkpointId == first_cp.id)
+        .filter(first_log.truckId == CheckpointLog.truckId)
+        .filter(first_cp.workflowId == final.workflowId)
+        .scalar_subquery()
+    )
+    completions = (
+        db.query(final.workflowId, CheckpointLog.checkOutTime, started.label("started"))
+        .select_from(CheckpointLog)
+        .join(final, CheckpointLog.checkpointId == final.id)
+        .join(last, and_(final.workflowId == last.c.workflowId, final.position == last.c.position))
+        .filter(CheckpointLog.checkOutTime >= start)
+        .filter(CheckpointLog.checkOutTime < end)
+        .all()
+    )
+
+    days = defaultdict(_empty_day)
+    for row in completions:
+        wf = days[row.checkOutTime.date()]["workflows"][row.workflowId]
+        wf["trucks_completed"] += 1
+        if row.started:
+            wf["turnaround_seconds"] += (row.checkOutTime - row.started).total_seconds()
+
+    visits = (
+        db.query(CheckpointLog.checkpointId, Checkpoint.workflowId, CheckpointLog.checkInTime, CheckpointLog.checkOutTime)
+        .join(Checkpoint, CheckpointLog.checkpointId == Checkpoint.id)
+        .filter(CheckpointLog.checkOutTime >= start)
+        .filter(CheckpointLog.checkOutTime < end)
+        .all()
+    )
+
+    for row in visits:
+        cp = days[row.checkOutTime.date()]["checkpoints"][row.checkpointId]
+        cp["workflow_id"] = row.workflowId
+        cp["visits"] += 1
+        if row.checkInTime:
+            cp["dwell_seconds"] += (row.checkOutTime - row.checkInTime).total_seconds()
+
+    return {
+        day: {"workflows": dict(data["workflows"]), "checkpoints": dict(data["checkpoints"])}
+        for day, data in days.items()
+    }
+
+
+def compute_day(db: Session, day: date) -> dict:
+    return compute_range(db, day, day).get(day) or {"workflows": {}, "checkpoints": {}}
+
+
+# ---------- Materializing closed days ----------
+
+def materialize_day(db: Session, day: date) -> bool:
+    """Writes the snapshot for one closed day. Returns False if another process already did."""
+    data = compute_day(db, day)
+
+    db.query(KpiWorkflowDaily).filter(KpiWorkflowDaily.day == day).delete()
+    db.query(KpiCheckpointDaily).filter(KpiCheckpointDaily.day == day).delete()
+    for workflow_id, wf in data["workflows"].items():
+        db.add(KpiWorkflowDaily(
+            day=day,
+            workflowId=workflow_id,
+            trucksCompleted=wf["trucks_completed"],
+            turnaroundSeconds=wf["turnaround_seconds"]
+        ))
+    for checkpoint_id, cp in data["checkpoints"].items():
+        db.add(KpiCheckpointDaily(
+            day=day,
+            checkpointId=checkpoint_id,
+            workflowId=cp["workflow_id"],
+            visits=cp["visits"],
+            dwellSeconds=cp["dwell_seconds"]
+        ))
+    db.add(KpiSnapshotDay(day=day))
+
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        # Only a concurrent worker that already marked this day is a lost race; anything
+        # else must surface so the day isn't skipped and later read as empty.
+        if db.query(KpiSnapshotDay).filter(KpiSnapshotDay.day == day).first() is None:
+            raise
+        return False
+    return True
+
+
+def last_snapshot_day(db: Session) -> Optional[date]:
+    return db.query(func.max(KpiSnapshotDay.day)).scalar()
+
+
+def pending_days(db: Session, now: datetime) -> List[date]:
+    """Closed days that have no snapshot yet, oldest first (catch-up after downtime)."""
+    latest = last_snapshot_day(db)
+    if latest is not None:
+        first = latest + timedelta(days=1)
+    else:
+        first_checkout = db.query(func.min(CheckpointLog.checkOutTime)).scalar()
+        if first_checkout is None:
+            return []
+        first = first_checkout.date()
+
+    last = last_closed_day(now)
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def catch_up(db: Session, now: Optional[datetime] = None) -> int:
+    """Materializes pending days; returns how many this process wrote (races lost don't count)."""
+    return sum(1 for day in pending_days(db, now or datetime.utcnow()) if materialize_day(db, day))
+
+
+# ---------- Reading ----------
+
+def _live_day(db: Session, day: date, closed_through: date) -> dict:
+    now = time.monotonic()
+    with _live_cache_lock:
+        cached = _live_cache.get(day)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    data = compute_day(db, day)
+
+    with _live_cache_lock:
+        # Only open days are ever cached, so the cache holds at most today (and yesterday
+        # during the close delay)
+        for closed in [d for d in _live_cache if d <= closed_through]:
+            del _live_cache[closed]
+        _live_cache[day] = (now + LIVE_CACHE_SECONDS, data)
+    return data
+
+
+def _avg_minutes(total_seconds: float, count: int) -> Optional[float]:
+    return round(total_seconds / count / 60, 2) if count else None
+
+
+def get_kpis(db: Session, start: date, end: date, now: Optional[datetime] = None) -> dict:
+    """
+    KPIs for [start, end] (inclusive). Snapshotted days are summed in SQL; closed days the
+    scheduler hasn't materialized yet are aggregated with one range query; only open days
+    (normally just today) are aggregated live per day.
+    """
+    now = now or datetime.utcnow()
+    end = min(end, now.date())
+    closed_through = last_closed_day(now)
+    latest = last_snapshot_day(db)
+    snapshot_end = min(end, latest) if latest else None
+
+    workflows = defaultdict(lambda: {"trucks_completed": 0, "turnaround_seconds": 0.0})
+    checkpoints = defaultdict(lambda: {"workflow_id": None, "visits": 0, "dwell_seconds": 0.0})
+    daily = defaultdict(lambda: {"trucks_completed": 0, "turnaround_seconds": 0.0})
+
+    def add_day(day: date, data: dict):
+        for workflow_id, wf in data["workflows"].items():
+            for bucket in (workflows[workflow_id], daily[day]):
+                bucket["trucks_completed"] += wf["trucks_completed"]
+                bucket["turnaround_seconds"] += wf["turnaround_seconds"]
+        for checkpoint_id, day_cp in data["checkpoints"].items():
+            cp = checkpoints[checkpoint_id]
+            cp["workflow_id"] = day_cp["workflow_id"]
+            cp["visits"] += day_cp["visits"]
+            cp["dwell_seconds"] += day_cp["dwell_seconds"]
+
+    if snapshot_end and snapshot_end >= start:
+        for row in (
+            db.query(
+                KpiWorkflowDaily.day,
+                KpiWorkflowDaily.workflowId,
+                func.sum(KpiWorkflowDaily.trucksCompleted).label("trucks"),
+                func.sum(KpiWorkflowDaily.turnaroundSeconds).label("seconds")
+            )
+            .filter(KpiWorkflowDaily.day >= start, KpiWorkflowDaily.day <= snapshot_end)
+            .group_by(KpiWorkflowDaily.day, KpiWorkflowDaily.workflowId)
+            .all()
+        ):
+            for bucket in (workflows[row.workflowId], daily[row.day]):
+                bucket["trucks_completed"] += row.trucks or 0
+                bucket["turnaround_seconds"] += row.seconds or 0.0
+
+        for row in (
+            db.query(
+                KpiCheckpointDaily.checkpointId,
+                KpiCheckpointDaily.workflowId,
+                func.sum(KpiCheckpointDaily.visits).label("visits"),
+                func.sum(KpiCheckpointDaily.dwellSeconds).label("seconds")
+            )
+            .filter(KpiCheckpointDaily.day >= start, KpiCheckpointDaily.day <= snapshot_end)
+            .group_by(KpiCheckpointDaily.checkpointId, KpiCheckpointDaily.workflowId)
+            .all()
+        ):
+            cp = checkpoints[row.checkpointId]
+            cp["workflow_id"] = row.workflowId
+            cp["visits"] += row.visits or 0
+            cp["dwell_seconds"] += row.seconds or 0.0
+
+    # Closed but not yet materialized (first boot, scheduler catching up): one range query
+    gap_start = max(start, latest + timedelta(days=1)) if latest else start
+    gap_end = min(end, closed_through)
+    if gap_start <= gap_end:
+        for day, data in compute_range(db, gap_start, gap_end).items():
+            add_day(day, data)
+
+    live_start = max(start, closed_through + timedelta(days=1))
+    live_days = [live_start + timedelta(days=i) for i in range((end - live_start).days + 1)]
+    for day in live_days:
+        add_day(day, _live_day(db, day, closed_through))
+
+    return {
+        "start": start,
+        "end": end,
+        "snapshot_through": snapshot_end,
+        "live_days": live_days,
+        "workflows": [
+            {
+                "workflow_id": workflow_id,
+                "trucks_completed": wf["trucks_completed"],
+                "avg_turnaround_minutes": _avg_minutes(wf["turnaround_seconds"], wf["trucks_completed"])
+            }
+            for workflow_id, wf in sorted(workflows.items())
+        ],
+        "checkpoints": [
+            {
+                "checkpoint_id": checkpoint_id,
+                "workflow_id": cp["workflow_id"],
+                "visits": cp["visits"],
+                "avg_dwell_minutes": _avg_minutes(cp["dwell_seconds"], cp["visits"])
+            }
+            for checkpoint_id, cp in sorted(checkpoints.items())
+        ],
+        "daily": [
+            {
+                "day": day,
+                "trucks_completed": d["trucks_completed"],
+                "avg_turnaround_minutes": _avg_minutes(d["turnaround_seconds"], d["trucks_completed"])
+            }
+            for day, d in sorted(daily.items())
+        ],
+    }
@@ -1,11 +1,22 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from auth.auth_router import router as auth_router
 from admin.workflows import router as workflow_router
 from admin.trucks import router as truck_router
 from admin.reports import router as report_router
 from admin.users import router as user_router
+from admin.profiling import router as profiling_router
+from admin.kpis import router as kpi_router
 from operator_routes.routes import router as operator_router  # ✅ NEW LINE
 from fastapi.middleware.cors import CORSMiddleware
+from middleware.admission import AdmissionControlMiddleware, apply_threadpool_limit
+from middleware.profiling import ProfilingMiddleware, install_sql_hooks
+from database import engine
+import warmup
+from kpi import scheduler as kpi_scheduler
 
 app = FastAPI(
     title="Truck Management System API",
@@ -15,6 +26,14 @@ app = FastAPI(
 
 
 
+# ✅ On-demand profiling (admin 'X-Profile: 1' header or sampling); innermost so shed requests are not profiled
+install_sql_hooks(engine)
+app.add_middleware(ProfilingMiddleware)
+
+# ✅ Admission control: per-class concurrency limits, load shedding and per-client rate limits.
+# Added before CORS so that 429/503 responses still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware)
+
 # Configure this after creating `app`
 app.add_middleware(
     CORSMiddleware,
@@ -29,6 +48,8 @@ app.include_router(workflow_router, prefix="/workflows")
 app.include_router(truck_router, prefix="/trucks")
 app.include_router(user_router, prefix="/users")
 app.include_router(report_router, prefix="/reports")
+app.include_router(profiling_router, prefix="/profiles")
+app.include_router(kpi_router, prefix="/kpis")
 
 # ✅ Operator routes
 app.include_router(operator_router, prefix="/operator")
@@ -36,6 +57,37 @@ app.include_router(operator_router, prefix="/operator")
 # ✅ Auth routes
 app.include_router(auth_router)
 
+# ✅ Size the sync-endpoint threadpool to match the admission control budget
+@app.on_event("startup")
+async def set_threadpool_limit():
+    apply_threadpool_limit()
+
+# ✅ Startup: warm the pool, compiled query cache and OpenAPI schema in the background
+warmup.state["import_seconds"] = round(time.perf_counter() - _import_started, 4)
+
+@app.on_event("startup")
+def start_warmup():
+    warmup.start_warmup(app)
+
+# ✅ Background scheduler that snapshots daily KPIs once each day closes
+@app.on_event("startup")
+def start_kpi_scheduler():
+    kpi_scheduler.start_scheduler()
+
+@app.on_event("shutdown")
+def stop_kpi_scheduler():
+    kpi_scheduler.stop_scheduler()
+
+@app.get("/health", include_in_schema=False)
+def health():
+    return {"status": "ok"}
+
+@app.get("/ready", include_in_schema=False)
+def ready():
+    return JSONResponse(warmup.state, status_code=200 if warmup.state["ready"] else 503)
+
 if __name__ == "__main__":
+    import os
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
@@ -0,0 +1,211 @@
+# middleware/admission.py
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import anyio.to_thread
+from starlette.responses import JSONResponse
+
+from auth.auth_handler import decode_access_token
+from database import DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+logger = logging.getLogger("uvicorn.error")
+
+# ---------- Priority classes ----------
+
+# ✅ Capacity budget. Every request in these classes holds one pooled DB connection and one
+# AnyIO worker thread (sync endpoints) for its whole duration. The non-operator classes
+# together are capped at DB_CONNECTIONS - OPERATOR_RESERVED_CONNECTIONS, so however busy
+# reports, admin pages and logins get, /operator/* always finds that many connections free
+# instead of waiting in pool checkout. main.py applies THREADPOOL_SIZE to AnyIO's thread
+# limiter at startup, and all class limits together stay within it.
+DB_CONNECTIONS = DB_POOL_SIZE + DB_MAX_OVERFLOW
+THREADPOOL_SIZE = int(os.environ.get("THREADPOOL_SIZE", 40))  # AnyIO's default is 40
+OPERATOR_RESERVED_CONNECTIONS = max(0, min(
+    int(os.environ.get("OPERATOR_RESERVED_CONNECTIONS", DB_CONNECTIONS // 3)),
+    DB_CONNECTIONS - 3,  # leave at least one connection for each other class
+))
+
+if DB_CONNECTIONS < 4:
+    logger.warning(
+        "DB pool has %s connection(s); at least 4 are needed to give every priority class "
+        "a slot and keep one for /operator. Classes will overcommit the pool.",
+        DB_CONNECTIONS
+    )
+
+_shared = DB_CONNECTIONS - OPERATOR_RESERVED_CONNECTIONS
+_reports_limit = max(1, _shared // 5)
+_auth_limit = max(1, (_shared - _reports_limit) // 2)
+_admin_limit = max(1, _shared - _reports_limit - _auth_limit)
+_operator_limit = max(1, min(DB_CONNECTIONS, THREADPOOL_SIZE - _shared))
+
+
+def apply_threadpool_limit():
+    """Sizes AnyIO's default thread limiter (used for sync endpoints) to THREADPOOL_SIZE."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
+# ✅ Each class gets its own concurrency limit and wait queue.
+# queue_size = 0 means "shed immediately when saturated" (low priority).
+PRIORITY_CLASSES = {
+    "operator": {"limit": _operator_limit, "queue_size": 64, "queue_timeout": 5.0, "retry_after": 1},
+    "auth": {"limit": _auth_limit, "queue_size": 32, "queue_timeout": 2.0, "retry_after": 2},
+    "admin": {"limit": _admin_limit, "queue_size": 0, "queue_timeout": 0.0, "retry_after": 5},
+    "reports": {"limit": _reports_limit, "queue_size": 0, "queue_timeout": 0.0, "retry_after": 10},
+}
+
+# ✅ First matching (path prefix, methods) wins; methods=None matches any method.
+# Unmatched paths (docs, openapi.json, health checks) are not admission controlled.
+ROUTE_CLASSES: List[Tuple[str, Optional[set], str]] = [
+    ("/operator", None, "operator"),
+    ("/login", None, "auth"),
+    ("/register", None, "auth"),
+    ("/reports", None, "reports"),
+    ("/workflows", None, "admin"),
+    ("/trucks", None, "admin"),
+    ("/users", None, "admin"),
+    ("/profiles", None, "admin"),
+    ("/kpis", None, "admin"),
+]
+
+# ✅ Per-client token bucket (keyed by the verified token's user, falling back to client IP)
+RATE_LIMIT_PER_SECOND = 20.0
+RATE_LIMIT_BURST = 40
+RATE_LIMIT_MAX_CLIENTS = 10000
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    for prefix, methods, name in ROUTE_CLASSES:
+        if path == prefix or path.startswith(prefix + "/"):
+            if methods is None or method in methods:
+                return name
+    return None
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests for one priority class, with a bounded wait queue."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float, retry_after: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked() and self._waiting >= self.queue_size:
+            return False
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout or None)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiting -= 1
+
+    def release(self):
+        self._semaphore.release()
+
+
+class TokenBucketRateLimiter:
+    """Per-client token buckets, kept in a bounded LRU so idle clients age out."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def allow(self, key: str) -> Tuple[bool, float]:
+        """Returns (allowed, seconds until the next token is available)."""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+        wait = 0.0 if allowed else (1.0 - tokens) / self.rate
+        return allowed, wait
+
+
+def _client_key(scope) -> str:
+    # Only a token that verifies earns its own bucket; bogus tokens share the caller's IP bucket
+    for name, value in scope.get("headers") or []:
+        if name == b"authorization":
+            token = value.decode("latin-1")
+            if token.lower().startswith("bearer "):
+                payload = decode_access_token(token[7:])
+                if payload:
+                    return "user:" + str(payload.get("user_id") or payload.get("sub"))
+            break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that sheds load per priority class so a report run or a login
+    storm cannot slow down the operator scanner endpoints.
+    """
+
+    def __init__(
+        self,
+        app,
+        classes: Optional[Dict[str, dict]] = None,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: int = RATE_LIMIT_BURST,
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+    ):
+        self.app = app
+        self.limiters = {
+            name: ConcurrencyLimiter(name, **config)
+            for name, config in (classes or PRIORITY_CLASSES).items()
+        }
+        self.rate_limiter = TokenBucketRateLimiter(rate, burst, max_clients)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters.get(classify_route(scope["method"], scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, wait = self.rate_limiter.allow(_client_key(scope))
+        if not allowed:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, int(wait + 0.999)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            response = JSONResponse(
+                {"detail": f"Server busy ({limiter.name}), retry later"},
+                status_code=503,
+                headers={"Retry-After": str(limiter.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,261 @@
+# middleware/profiling.py
+import asyncio
+import contextvars
+import functools
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+from auth.auth_handler import decode_access_token
+
+# ---------- Settings ----------
+
+PROFILE_HEADER = b"x-profile"          # admins send "X-Profile: 1" to profile one request
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))  # fraction of all requests profiled automatically (0 = off)
+PROFILE_INTERVAL = 0.005               # seconds between stack samples
+PROFILE_BUFFER_SIZE = 50               # profiles kept in memory, oldest dropped first
+PROFILE_MAX_STATEMENTS = 500           # SQL statements recorded per profile
+PROFILE_MAX_DEPTH = 64                 # frames kept per sampled stack
+
+# ✅ Set only while a profiled request is in flight; copied into threadpool workers
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("current_profile", default=None)
+
+_profile_ids = itertools.count(1)
+_profiles_lock = threading.Lock()
+profiles: deque = deque(maxlen=PROFILE_BUFFER_SIZE)
+
+
+class RequestProfile:
+    """Stack samples and SQL timings collected for a single request."""
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.id = next(_profile_ids)
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = datetime.utcnow()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.samples = Counter()
+        self.sample_count = 0
+        self.statements: List[dict] = []
+        self.statements_dropped = 0
+        self.thread_ids = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ----- stack sampling -----
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(PROFILE_INTERVAL):
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                if thread_id == own_id or thread_id not in frames:
+                    continue
+                self.samples[_fold_stack(frames[thread_id])] += 1
+                self.sample_count += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample_loop, name=f"profiler-{self.id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    # ----- SQL -----
+
+    def record_statement(self, statement: str, duration_ms: float):
+        if len(self.statements) >= PROFILE_MAX_STATEMENTS:
+            self.statements_dropped += 1
+            return
+        self.statements.append({"statement": statement, "duration_ms": round(duration_ms, 3)})
+
+    # ----- output -----
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status_code": self.status_code,
+            "sample_count": self.sample_count,
+            "statement_count": len(self.statements) + self.statements_dropped,
+            "sql_time_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+        }
+
+    def to_dict(self) -> dict:
+        data = self.summary()
+        data["stacks"] = [
+            {"stack": stack, "samples": count} for stack, count in self.samples.most_common()
+        ]
+        data["statements"] = self.statements
+        data["statements_dropped"] = self.statements_dropped
+        return data
+
+    def folded(self) -> str:
+        """Collapsed-stack format, usable directly with flamegraph tools."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def _fold_stack(frame) -> str:
+    parts = []
+    while frame is not None and len(parts) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_filename}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def get_profile(profile_id: int) -> Optional[RequestProfile]:
+    with _profiles_lock:
+        for profile in profiles:
+            if profile.id == profile_id:
+                return profile
+    return None
+
+
+def list_profiles() -> List[RequestProfile]:
+    with _profiles_lock:
+        return list(reversed(profiles))
+
+
+# ---------- SQL hooks ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is None:
+        return
+    conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profile_query_start")
+    if not starts:
+        return
+    profile.record_statement(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+
+def install_sql_hooks(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ---------- Thread registration ----------
+
+def _profiled_endpoint(endpoint):
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            # ✅ Sample the event-loop thread only while this coroutine handler runs
+            thread_id = threading.get_ident()
+            profile.thread_ids.add(thread_id)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.thread_ids.discard(thread_id)
+
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        # ✅ Sample this worker thread only while it runs this request's handler
+        thread_id = threading.get_ident()
+        profile.thread_ids.add(thread_id)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.thread_ids.discard(thread_id)
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Route class that lets the profiler sample the thread running a request's handler."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
+
+
+# ---------- Middleware ----------
+
+def _profile_trigger(scope) -> Optional[str]:
+    requested = False
+    token = None
+    for name, value in scope.get("headers") or []:
+        if name == PROFILE_HEADER:
+            requested = value.strip().lower() in (b"1", b"true", b"yes")
+        elif name == b"authorization":
+            token = value.decode("latin-1")
+
+    if requested and token and token.lower().startswith("bearer "):
+        payload = decode_access_token(token[7:])
+        if payload and payload.get("role") == "admin":
+            return "header"
+
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in request profiler. A request is profiled when an admin sends the
+    X-Profile header or when it is picked by PROFILE_SAMPLE_RATE; otherwise it
+    passes straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = _profile_trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], trigger)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        profile.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await run_in_threadpool(profile.stop)
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            _current_profile.reset(token)
+            with _profiles_lock:
+                profiles.append(profile)
@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, Date, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
@@ -42,5 +42,32 @@ class CheckpointLog(Base):
     checkpointId = Column(Integer, ForeignKey("checkpoints.id"))
     operatorId = Column(Integer, ForeignKey("users.id"))
     checkInTime = Column(DateTime, default=datetime.datetime.utcnow)
-    checkOutTime = Column(DateTime, nullable=True)
+    checkOutTime = Column(DateTime, nullable=True, index=True)
     notes = Column(Text)
+
+# ---------- KPI snapshots (materialized by kpi/scheduler.py once a day closes) ----------
+# Sums are stored instead of averages so days can be combined over any range.
+
+class KpiWorkflowDaily(Base):
+    __tablename__ = "kpi_workflow_daily"
+    __table_args__ = (UniqueConstraint("day", "workflowId"),)
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True)
+    workflowId = Column(Integer, ForeignKey("workflows.id"))
+    trucksCompleted = Column(Integer)
+    turnaroundSeconds = Column(Float)  # total over trucksCompleted
+
+class KpiCheckpointDaily(Base):
+    __tablename__ = "kpi_checkpoint_daily"
+    __table_args__ = (UniqueConstraint("day", "checkpointId"),)
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True)
+    checkpointId = Column(Integer, ForeignKey("checkpoints.id"))
+    workflowId = Column(Integer, ForeignKey("workflows.id"))
+    visits = Column(Integer)
+    dwellSeconds = Column(Float)  # total over visits
+
+class KpiSnapshotDay(Base):
+    __tablename__ = "kpi_snapshot_days"
+    day = Column(Date, primary_key=True)  # marks a day as fully materialized
+    createdAt = Column(DateTime, default=datetime.datetime.utcnow)
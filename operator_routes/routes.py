@@ -2,12 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import User, Truck, CheckpointLog, Checkpoint
+from middleware.profiling import ProfiledRoute
 from auth.dependencies import require_operator
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
-router = APIRouter(tags=["Operator"])
+router = APIRouter(tags=["Operator"], route_class=ProfiledRoute)
 
 def get_db():
     db = SessionLocal()
@@ -101,6 +102,14 @@ class TruckLogIn(BaseModel):
     action: str = Field(..., example="checkin")  # or "checkout"
     notes: Optional[str] = Field(None, example="Truck arrived 10 mins late")
 
+# ✅ A truck's log at this operator's checkpoint, if any
+def find_checkpoint_log(db: Session, truck_id: int, checkpoint_id: int, operator_id: int):
+    return db.query(CheckpointLog).filter_by(
+        truckId=truck_id,
+        checkpointId=checkpoint_id,
+        operatorId=operator_id
+    ).first()
+
 @router.post(
     "/log",
     summary="Check-in or Check-out truck",
@@ -116,11 +125,7 @@ def log_checkpoint_action(data: TruckLogIn, current_user: dict = Depends(require
         raise HTTPException(status_code=400, detail="Truck not at your checkpoint")
 
     # Find existing log
-    log = db.query(CheckpointLog).filter_by(
-        truckId=data.truck_id,
-        checkpointId=checkpoint_id,
-        operatorId=operator_id
-    ).first()
+    log = find_checkpoint_log(db, data.truck_id, checkpoint_id, operator_id)
 
     if data.action == "checkin":
         if log and log.checkInTime:
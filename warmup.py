@@ -0,0 +1,103 @@
+# warmup.py
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+
+from database import engine, SessionLocal, DB_POOL_SIZE
+from models import User, Truck, Checkpoint
+from admin.reports import turnaround_query
+from admin.trucks import truck_status_query
+from operator_routes.routes import find_checkpoint_log
+
+logger = logging.getLogger("uvicorn.error")
+
+# ✅ How many pooled connections to open before reporting ready (capped at the pool size,
+# extra connections would just be discarded when returned to the pool)
+WARMUP_CONNECTIONS = min(int(os.environ.get("WARMUP_CONNECTIONS", DB_POOL_SIZE)), DB_POOL_SIZE)
+WARMUP_RETRY_SECONDS = 5
+
+# ✅ Shared warm-up state, reported by the /ready endpoint
+state = {
+    "ready": False,
+    "import_seconds": None,
+    "startup_seconds": None,
+    "steps": {},
+    "attempts": 0,
+    "last_error": None,
+}
+
+
+def _timed(name, fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    state["steps"][name] = round(time.perf_counter() - started, 4)
+
+
+def _open_connections():
+    # Hold all connections at once so the pool really grows to WARMUP_CONNECTIONS
+    connections = []
+    try:
+        for _ in range(WARMUP_CONNECTIONS):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def _compile_hot_queries():
+    # Running each hot statement once fills SQLAlchemy's compiled cache; cache keys ignore
+    # bound values, so impossible IDs/ranges warm the same entries real requests will hit.
+    # The router helpers imported above are the ones the endpoints call, so the statements
+    # compiled here are exactly the ones served later.
+    epoch = datetime(1970, 1, 1)
+    db = SessionLocal()
+    try:
+        turnaround_query(db, epoch, epoch).all()
+        truck_status_query(db).all()
+        find_checkpoint_log(db, 0, 0, 0)
+        # Operator scanner path (/operator/log, /operator/trucks, /operator/checkpoint)
+        db.query(Truck).get(0)
+        db.query(Checkpoint).get(0)
+        db.query(Truck).filter(Truck.currentCheckpointId == 0).all()
+        db.query(User).get(0)
+        db.query(User).filter(User.email == "").first()
+    finally:
+        db.rollback()
+        db.close()
+
+
+def _build_openapi(app):
+    app.openapi()
+
+
+def run_warmup(app):
+    """Warm the process once; retries until the database is reachable."""
+    started = time.perf_counter()
+    while True:
+        state["attempts"] += 1
+        try:
+            _timed("openapi_schema", _build_openapi, app)
+            _timed("db_connections", _open_connections)
+            _timed("query_compilation", _compile_hot_queries)
+            break
+        except Exception as exc:
+            state["last_error"] = repr(exc)
+            logger.warning("Warm-up attempt %s failed: %r", state["attempts"], exc)
+            time.sleep(WARMUP_RETRY_SECONDS)
+
+    state["startup_seconds"] = round(time.perf_counter() - started, 4)
+    state["ready"] = True
+    logger.info(
+        "Warm-up finished in %.3fs (imports %.3fs): %s",
+        state["startup_seconds"], state["import_seconds"] or 0.0, state["steps"]
+    )
+
+
+def start_warmup(app):
+    threading.Thread(target=run_warmup, args=(app,), name="warmup", daemon=True).start()